@@ -0,0 +1,126 @@
+"""
+HONG KONG JOCKEY CLUB HORSE RACE COMMAND-LINE INTERFACE
+Version 01
+    This programme runs the scraper from command line, e.g. for cron jobs.
+        A. Subcommands
+            1.  backfill            scrape all race meetings after the last cached one.
+            2.  meeting             scrape a race date, optionally a single race number.
+            3.  odds-poll           scrape current odds table repeatedly on an interval.
+            4.  refresh-profiles    scrape trainer, jockey and horse info missing from cache or of a previous year.
+            5.  cache stats         summarise local cache files as plain text without pandas or tabulate.
+        B. Options
+            1.  --quiet shows warnings only and --json writes one JSON object per message.
+            2.  Selenium, pandas and tabulate are imported only by the subcommand that needs them.
+Contribution: Jack Chan
+"""
+
+import os
+import logging
+import argparse
+from datetime import datetime
+
+import utilities
+
+def get_scraper():
+    # heavy dependencies are loaded by scraping subcommands only
+    from hkjc_horse_race_scraping import HongKongJockeyClubHorseRace
+    
+    return HongKongJockeyClubHorseRace()
+
+def run_backfill(args) -> None:
+    df = get_scraper().query_horse_race_result(None, None, not args.no_addit_info)
+    utilities.print_msg(f'Backfill scraped {0 if df is None else df.shape[0]} record(s).', 'simple')
+    
+    return None
+
+def run_meeting(args) -> None:
+    df = get_scraper().query_horse_race_result(args.race_date, args.race_no, not args.no_addit_info)
+    utilities.print_msg(f'Meeting {args.race_date} scraped {0 if df is None else df.shape[0]} record(s).', 'simple')
+    
+    return None
+
+def run_odds_poll(args) -> None:
+    df = get_scraper().query_odds_menu(args.race_no, not args.no_addit_info, args.count, args.interval)
+    utilities.print_msg(f'{args.count} odds poll(s) scraped {0 if df is None else df.shape[0]} record(s).', 'simple')
+    
+    return None
+
+def run_refresh_profiles(args) -> None:
+    get_scraper().query_profile_info()
+    
+    return None
+
+def run_cache_stats(args) -> None:
+    if not os.path.exists('./cache'):
+        utilities.print_msg('No local cache file!', None, logging.WARNING)
+        return None
+    
+    # parquet metadata gives row count without reading the table
+    import pyarrow.parquet as pq
+    
+    for file in sorted(os.listdir('./cache')):
+        if not file.endswith('.parquet'):
+            continue
+        
+        path = f'./cache/{file}'
+        n_row = pq.read_metadata(path).num_rows
+        size = os.path.getsize(path) / 1024
+        last_update = datetime.fromtimestamp(os.path.getmtime(path)).strftime('%Y/%m/%d %H:%M')
+        utilities.print_msg(f'{file[:-8]}: {n_row} record(s), {size:.1f} KB, updated {last_update}', None)
+    
+    # summarise race meetings by status
+    if os.path.exists('./cache/hkjc_race_calendar.parquet'):
+        # skip pandas metadata so that pandas is not imported
+        status = pq.ParquetFile('./cache/hkjc_race_calendar.parquet') \
+            .read(columns = ['race_status'], use_pandas_metadata = False) \
+            .column('race_status').to_pylist()
+        utilities.print_msg(
+            'hkjc_race_calendar: ' + ', '.join(f'{val} {status.count(val)}' for val in sorted(set(status)))
+            , None
+        )
+    
+    return None
+
+def get_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description = 'Hong Kong Jockey Club horse race data scraper.')
+    parser.add_argument('--quiet', action = 'store_true', help = 'show warnings only')
+    parser.add_argument('--json', action = 'store_true', help = 'write messages as JSON lines')
+    subparsers = parser.add_subparsers(dest = 'command', required = True)
+    
+    backfill = subparsers.add_parser('backfill', help = 'scrape race meetings after the last cached one')
+    backfill.add_argument('--no-addit-info', action = 'store_true', help = 'skip trainer, jockey and horse info')
+    backfill.set_defaults(func = run_backfill)
+    
+    meeting = subparsers.add_parser('meeting', help = 'scrape a race date')
+    meeting.add_argument('race_date', help = 'race date in YYYY/MM/DD')
+    meeting.add_argument('--race-no', type = int, default = None, help = 'race number, all races by default')
+    meeting.add_argument('--no-addit-info', action = 'store_true', help = 'skip trainer, jockey and horse info')
+    meeting.set_defaults(func = run_meeting)
+    
+    odds_poll = subparsers.add_parser('odds-poll', help = 'scrape current odds table repeatedly')
+    odds_poll.add_argument('--race-no', type = int, default = None, help = 'race number, all races by default')
+    odds_poll.add_argument('--interval', type = int, default = 60, help = 'seconds between polls')
+    odds_poll.add_argument('--count', type = int, default = 1, help = 'number of polls')
+    odds_poll.add_argument('--no-addit-info', action = 'store_true', help = 'skip trainer, jockey and horse info')
+    odds_poll.set_defaults(func = run_odds_poll)
+    
+    refresh_profiles = subparsers.add_parser('refresh-profiles', help = 'scrape profiles missing from cache or of a previous year')
+    refresh_profiles.set_defaults(func = run_refresh_profiles)
+    
+    cache = subparsers.add_parser('cache', help = 'inspect local cache files')
+    cache_subparsers = cache.add_subparsers(dest = 'cache_command', required = True)
+    cache_stats = cache_subparsers.add_parser('stats', help = 'summarise local cache files')
+    cache_stats.set_defaults(func = run_cache_stats)
+    
+    return parser
+
+def main(argv = None) -> None:
+    args = get_parser().parse_args(argv)
+    
+    utilities.init_logger(args.quiet, args.json)
+    args.func(args)
+    
+    return None
+
+if __name__ == '__main__':
+    main()
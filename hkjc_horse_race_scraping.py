@@ -1,19 +1,26 @@
 """
 HONG KONG JOCKEY CLUB HORSE RACE DATA SCRAPER
-Version 08
+Version 10
     This programme scraps horse race result from HKJC just for fun.
         A. Historical Horse Race Record
             f(.) = query_horse_race_result(race_date, race_no, is_addit_info)
                 1.  Input a STR race date, an INT race number and a BOOL flag for additonal info.
                 2.  Output race result, horse info, trainer info and jockey info as a data frame.
         B. Current Odds Menu Table
-            g(.) = query_odds_menu(race_no, is_addit_info)
-                1.  Input an INT race number and a BOOL flag for additonal info.
-                2.  Output current odds table on given race number.
+            g(.) = query_odds_menu(race_no, is_addit_info, n_poll, interval)
+                1.  Input an INT race number, a BOOL flag for additonal info, an INT number of poll and INT seconds between polls.
+                2.  Output current odds table on given race number, one snapshot per poll time.
+        C. Trainer, Jockey and Horse Profile
+            h(.) = query_profile_info()
+                1.  Input nothing; ids are taken from cached race result and odds menu.
+                2.  Output trainer, jockey and horse info, scraping ids not yet cached or last updated in a previous year.
+    Command-line entry point is provided in hkjc_cli.py.
 Contribution: Jack Chan
 """
 
 import re
+import time
+import logging
 import pandas as pd
 from datetime import datetime
 from selenium import webdriver
@@ -22,6 +29,7 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 
 import utilities
+from hkjc_race_calendar import RaceCalendar
 
 class HongKongJockeyClubHorseRace():
     def __init__(self) -> None:
@@ -47,21 +55,24 @@ class HongKongJockeyClubHorseRace():
         self.__odds_race_tag = "//div[@style='padding:3px 3px 3px 3px']/div"
         self.__odds_id = "//div[@id='winplaceTable']/table/tbody"
         self.__odds_menu = "//div[@id='winplaceTable']"
+        
+        # local calendar of race meetings
+        self.__calendar = RaceCalendar(self.__url_result)
     
     def __get_default_settings(self, web) -> None:
-        web.get(self.__url_result)
-        WebDriverWait(web, 10).until(
-            EC.presence_of_element_located((By.XPATH, self.__tag_date))
-        )
-        
-        self.__race_date = pd.to_datetime(
-            re.findall(r'(\d{2,4}/\d{2,4}/\d{2,4})(?=</option>)', web.page_source)
-            , format = '%d/%m/%Y'
-        ).strftime('%Y/%m/%d')
+        # refresh race dates from the result page only when calendar is outdated
+        if self.__calendar.is_outdated():
+            web.get(self.__url_result)
+            WebDriverWait(web, 10).until(
+                EC.presence_of_element_located((By.XPATH, self.__tag_date))
+            )
+            
+            self.__calendar.update_race_dates(pd.to_datetime(
+                re.findall(r'(\d{2,4}/\d{2,4}/\d{2,4})(?=</option>)', web.page_source)
+                , format = '%d/%m/%Y'
+            ).strftime('%Y/%m/%d'))
         
-        self.__race_date = self.__race_date[
-            self.__race_date < datetime.today().strftime('%Y/%m/%d')
-        ]
+        self.__race_date = self.__calendar.get_race_dates()
         
         df = utilities.restore_df('hkjc_horse_race')
         if 'race_date' in df.columns:
@@ -93,31 +104,58 @@ class HongKongJockeyClubHorseRace():
             
             return df
         
-        def is_invalid_data(web, race_date, race_no) -> bool:
-            # bypass invalid race date input
-            if (race_date is not None) & (race_date not in self.__race_date):
-                utilities.print_msg(f'Race date {race_date} was not hosting horse race!', 'simple')
+        def is_invalid_data(race_date, race_no) -> bool:
+            meeting = self.__calendar.get_meeting(race_date)
+            
+            # bypass invalid race date input, including today and later
+            if (meeting is None) or (race_date not in self.__calendar.get_race_dates()):
+                utilities.print_msg(f'Race date {race_date} was not hosting horse race!', 'simple', logging.WARNING)
                 return True
             
             # keep only local horse race
-            if 'overseas' in web.current_url:
-                utilities.print_msg(f'Date {race_date} was an oversea race!', 'simple')
+            if meeting['race_status'] == 'overseas':
+                utilities.print_msg(f'Date {race_date} was an oversea race!', 'simple', logging.WARNING)
                 return True
             
             # prevent abandoned race record
-            if 'refund' in web.page_source:
-                utilities.print_msg(f'Date {race_date} was an abandoned race!', 'simple')
+            if meeting['race_status'] == 'abandoned':
+                utilities.print_msg(f'Date {race_date} was an abandoned race!', 'simple', logging.WARNING)
                 return True
             
             # avoid input race_no out of bound
             if race_no is not None:
-                n_race = web.find_elements_by_xpath(self.__tag_card)
-                if race_no not in range(1, len(n_race) - 1):
-                    utilities.print_msg(f'Race No. {race_no} did not exist on date {race_date}!', 'simple')
+                if race_no not in range(1, int(meeting['n_race']) + 1):
+                    utilities.print_msg(f'Race No. {race_no} did not exist on date {race_date}!', 'simple', logging.WARNING)
                     return True
             
             return False
         
+        def probe_race_meeting(web, race_date) -> bool:
+            web.get(self.__calendar.get_probe_url(race_date))
+            
+            # keep only local horse race
+            if 'overseas' in web.current_url:
+                self.__calendar.update_meeting(race_date, 'overseas')
+                return False
+            
+            # prevent abandoned race record
+            if 'refund' in web.page_source:
+                self.__calendar.update_meeting(race_date, 'abandoned')
+                return False
+            
+            # get racing venue
+            race_venue = web.find_element_by_xpath(self.__tag_venue).text
+            race_venue = ['HV', 'ST']['Sha Tin' in race_venue]
+            
+            WebDriverWait(web, 20).until(
+                EC.presence_of_element_located((By.XPATH, self.__tag_card))
+            )
+            
+            race_card = get_race_card_index(web.find_elements_by_xpath(self.__tag_card))
+            self.__calendar.update_meeting(race_date, 'local', race_venue, race_card)
+            
+            return True
+        
         def get_race_card_index(card) -> int:
             cnt = 0
             for val in card:
@@ -164,38 +202,30 @@ class HongKongJockeyClubHorseRace():
         if df.shape[0] != 0:
             return df
         
-        web.get(f'{self.__url_result}?RaceDate={race_date}')
+        # detect venue and race card once for a new meeting which has passed
+        is_probed = False
+        meeting = self.__calendar.get_meeting(race_date)
+        if (meeting is not None) and (meeting['race_status'] == 'pending') \
+                and (race_date in self.__calendar.get_race_dates()):
+            is_probed = probe_race_meeting(web, race_date)
         
         # handle unexpected results
-        if is_invalid_data(web, race_date, race_no):
+        if is_invalid_data(race_date, race_no):
             return None
         
-        # get racing venue
-        race_venue = web.find_element_by_xpath(self.__tag_venue).text
-        race_venue = ['HV', 'ST']['Sha Tin' in race_venue]
-        
-        # reload web browser with full URL
-        web.get(f'{self.__url_result}?RaceDate={race_date}&Racecourse={race_venue}')
-        WebDriverWait(web, 20).until(
-            EC.presence_of_element_located((By.XPATH, self.__tag_card))
-        )
+        race_venue = self.__calendar.get_meeting(race_date)['race_venue']
         
-        race_card = get_race_card_index(web.find_elements_by_xpath(self.__tag_card))
-        
-        for race_idx in range(1, race_card + 1):
-            # allocate target race number if defined
-            if (race_no is not None) & (race_no != race_idx):
-                continue
-            
-            # reload web browser with full URL
-            web.get(f'{self.__url_result}?RaceDate={race_date}&Racecourse={race_venue}&RaceNo={race_idx}')
+        for race_idx, url in self.__calendar.plan_navigation(race_date, race_no):
+            # load only the planned race pages; probe page already shows race 1 result
+            if not (is_probed & (race_idx == 1)):
+                web.get(url)
             try:
                 WebDriverWait(web, 20).until(
                     EC.presence_of_element_located((By.XPATH, self.__tag_race_tag))
                 )
             except:
                 # stop when data is not yet available
-                utilities.print_msg(f'Race card {race_idx} is not yet available', 'simple')
+                utilities.print_msg(f'Race card {race_idx} is not yet available', 'simple', logging.WARNING)
                 break
             
             # get race details
@@ -444,7 +474,7 @@ class HongKongJockeyClubHorseRace():
             if race_no is not None:
                 n_race = web.page_source.count('selectRace')
                 if race_no not in range(1, n_race - 1):
-                    utilities.print_msg(f'Race No. {race_no} did not exist!', 'simple')
+                    utilities.print_msg(f'Race No. {race_no} did not exist!', 'simple', logging.WARNING)
                     return True
             
             return False
@@ -491,6 +521,7 @@ class HongKongJockeyClubHorseRace():
             return df
         
         df = pd.DataFrame()
+        poll_time = datetime.today().strftime('%Y/%m/%d %H:%M:%S')
         
         web.get(self.url_odds)
         WebDriverWait(web, 10).until(
@@ -544,7 +575,7 @@ class HongKongJockeyClubHorseRace():
             
             # combine information
             df_merge = pd.concat([race_info, instance_id], axis = 1).fillna(method = 'ffill')
-            df_merge = pd.concat([odds_menu, df_merge], axis = 1)
+            df_merge = pd.concat([odds_menu, df_merge], axis = 1).assign(poll_time = poll_time)
             
             df = pd.concat([df, df_merge], ignore_index = True)
             del race_info, instance_id, odds_menu, df_merge
@@ -554,56 +585,83 @@ class HongKongJockeyClubHorseRace():
         return df
 
     @utilities.elapse_time
-    @utilities.cache_df('hkjc_odds_menu', ['race_date', 'sec_div_no'])
-    def query_odds_menu(self, race_no = None, is_addit_info = True) -> pd.DataFrame:
+    @utilities.cache_df('hkjc_odds_menu', ['race_date', 'sec_div_no', 'poll_time'])
+    def __get_odds_snapshot(self, web, race_no, is_addit_info) -> pd.DataFrame:
+        # main task: scrape race result
+        odds_menu = self.__get_odds_menu(web, race_no)
+        
+        # minor task: scrape trainer, jockey and horse info if agree from input
+        if (odds_menu is not None) & (is_addit_info):
+            trainer = self.get_trainer_info(web, odds_menu['trainer_id'].unique())
+            jockey = self.get_jockey_info(web, odds_menu['jockey_id'].unique())
+            horse = self.get_horse_info(web, odds_menu['horse_num'].unique())
+            if 'horse_num' not in horse.columns:
+                horse.rename(columns = {'horse_id': 'horse_num'}, inplace = True)
+            
+            df = odds_menu \
+                .merge(trainer, on = 'trainer_id', how = 'left') \
+                .merge(jockey, on = 'jockey_id', how = 'left') \
+                .merge(horse, on = 'horse_num', how = 'left')
+            
+            del odds_menu, trainer, jockey, horse
+            return df
+        
+        return odds_menu
+    
+    @utilities.elapse_time
+    def query_odds_menu(self, race_no = None, is_addit_info = True, n_poll = 1, interval = 60) -> pd.DataFrame:
+        df = pd.DataFrame()
+        
+        # reuse one browser session across polls; each snapshot is cached by poll time
         with webdriver.Chrome('./chromedriver') as web:
-            
-            # main task: scrape race result
-            odds_menu = self.__get_odds_menu(web, race_no)
-            
-            # minor task: scrape trainer, jockey and horse info if agree from input
-            if (odds_menu is not None) & (is_addit_info):
-                trainer = self.get_trainer_info(web, odds_menu['trainer_id'].unique())
-                jockey = self.get_jockey_info(web, odds_menu['jockey_id'].unique())
-                horse = self.get_horse_info(web, odds_menu['horse_num'].unique())
-                if 'horse_num' not in horse.columns:
-                    horse.rename(columns = {'horse_id': 'horse_num'}, inplace = True)
-                
-                df = odds_menu \
-                    .merge(trainer, on = 'trainer_id', how = 'left') \
-                    .merge(jockey, on = 'jockey_id', how = 'left') \
-                    .merge(horse, on = 'horse_num', how = 'left')
+            for cnt in range(1, n_poll + 1):
+                df_merge = self.__get_odds_snapshot(web, race_no, is_addit_info)
+                if df_merge is not None:
+                    df = pd.concat([df, df_merge], ignore_index = True)
+                utilities.print_msg(f'Finished for odds poll {cnt}/{n_poll}!', 'simple') if n_poll > 1 else None
                 
-                del odds_menu, trainer, jockey, horse
-                return df
-            
-            return odds_menu
-
-if __name__ == '__main__':
-    demo = HongKongJockeyClubHorseRace()
-    
-    ## case 1: valid input and return result
-    #      |  race_date | race_venue | sec_div_no | index | race_class | distance | ... | horse_dams_sire | horse_last_update |
-    # |---:|:-----------|:-----------|:-----------|:------|:-----------|:---------|:----|:----------------|:------------------|
-    # |  0 | 2022/01/30 |         ST |          1 |   375 |          4 |     1200 | ... |       Strategic |              2022 |
-    # |  1 | 2022/01/30 |         ST |          1 |   375 |          4 |     1200 | ... |            Rahy |              2022 |
-    # |  2 | 2022/01/30 |         ST |          1 |   375 |          4 |     1200 | ... |    Scaredee Cat |              2022 |
-    # |  3 | 2022/01/30 |         ST |          1 |   375 |          4 |     1200 | ... |     King's Best |              2022 |
-    demo.query_horse_race_result('2022/01/30', 1)
-        
-    ## case 2: valid input but the race is hosted oversea
-    # Date 2021/10/16 was an oversea race!
-    demo.query_horse_race_result('2021/10/16', 2, False)
-    
-    ## case 3: valid input but the race is abandoned
-    # Date 2021/10/13 was an abandoned race!
-    demo.query_horse_race_result('2021/10/13', 3, False)
+                time.sleep(interval) if cnt != n_poll else None
+        
+        return df if df.shape[0] != 0 else None
 
-    ## case 4: valid input and return odds menu
-    #      |  horse_no |           horse | draw | actual_weight |    jockey |  trainer | ... |  horse_dams_sire | horse_last_update |
-    # |---:|:----------|:----------------|:-----|:--------------|:----------|:---------|:----|:-----------------|:------------------|
-    # |  0 |         1 |      CHARITY GO |  7.0 |         123.0 |  M F Poon | C S Shum | ... |        Muhtarram |              2022 |
-    # |  1 |         1 | DELIGHTFUL LAOS |  3.0 |         123.0 |  K Teetan | A S Cruz | ... |        Tillerman |              2022 |
-    # |  2 |         1 |   SUPER FOOTBAL |  5.0 |         123.0 | A Hamelin | K H Ting | ... | Redoute's Choice |              2022 |
-    # |  3 |         1 |    BERLIN TANGO |  1.0 |         122.0 |  Z Purton | A S Cruz | ... |   Sadler's Wells |              2022 |
-    demo.query_odds_menu(1)
\ No newline at end of file
+    @utilities.elapse_time
+    def query_profile_info(self) -> tuple:
+        
+        def drop_stale_profile(name) -> list:
+            df = utilities.restore_df(f'hkjc_{name}_info')
+            
+            if f'{name}_last_update' not in df.columns:
+                return []
+            
+            id_col = [f'{name}_id', 'horse_num'][f'{name}_num' in df.columns]
+            is_stale = df[f'{name}_last_update'] < datetime.today().strftime('%Y')
+            
+            # remove profiles of previous years from cache so that they are scraped again
+            if is_stale.any():
+                utilities.save_df(df[~is_stale], f'hkjc_{name}_info')
+                utilities.print_msg(f'{is_stale.sum()} {name} profile(s) are outdated.', 'orgtbl')
+            
+            return list(df.loc[is_stale, id_col])
+        
+        # ids from cached race result and odds menu
+        df = pd.concat([
+            utilities.restore_df('hkjc_race_result')
+            , utilities.restore_df('hkjc_odds_menu').rename(columns = {'horse_num': 'horse_id'})
+        ], ignore_index = True)
+        
+        if df.shape[0] == 0:
+            utilities.print_msg('No cached race result or odds menu for profile refresh!', 'simple', logging.WARNING)
+            return None, None, None
+        
+        ids = {
+            name: pd.Series(list(df[f'{name}_id'].dropna()) + drop_stale_profile(name)).unique()
+            for name in ['trainer', 'jockey', 'horse']
+        }
+        
+        with webdriver.Chrome('./chromedriver') as web:
+            trainer = self.get_trainer_info(web, ids['trainer'])
+            jockey = self.get_jockey_info(web, ids['jockey'])
+            horse = self.get_horse_info(web, ids['horse'])
+        
+        del df, ids
+        return trainer, jockey, horse
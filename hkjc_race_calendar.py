@@ -0,0 +1,120 @@
+"""
+HONG KONG JOCKEY CLUB RACE MEETING CALENDAR
+Version 01
+    This programme keeps a local calendar of race meetings to avoid redundant page loads.
+        A. Race Meeting Calendar
+            1.  Store race date, race venue, number of race and race status on local file.
+            2.  Race status is one of pending, local, overseas and abandoned.
+            3.  Race dates are refreshed from the result page at most once a day.
+        B. Navigation Planner
+            f(.) = plan_navigation(race_date, race_no)
+                1.  Input a STR race date and an INT race number.
+                2.  Output the minimum list of (race number, URL) to load for the request.
+Contribution: Jack Chan
+"""
+
+import pandas as pd
+from datetime import datetime
+
+import utilities
+
+class RaceCalendar():
+    def __init__(self, url_result) -> None:
+        self.__file_name = 'hkjc_race_calendar'
+        self.__url_result = url_result
+        self.__columns = ['race_date', 'race_venue', 'n_race', 'race_status', 'last_update']
+        
+        self.calendar = utilities.restore_df(self.__file_name)
+        if self.calendar.shape[0] == 0:
+            self.calendar = pd.DataFrame(columns = self.__columns)
+    
+    def __save_calendar(self) -> None:
+        self.calendar['n_race'] = self.calendar['n_race'].astype(int)
+        utilities.save_df(self.calendar, self.__file_name)
+        
+        return None
+    
+    def is_outdated(self) -> bool:
+        # race dates are refreshed once a day
+        if self.calendar.shape[0] == 0:
+            return True
+        
+        return self.calendar['last_update'].max() < datetime.today().strftime('%Y/%m/%d')
+    
+    def get_race_dates(self) -> pd.Index:
+        race_date = pd.Index(sorted(self.calendar['race_date']))
+        
+        return race_date[race_date < datetime.today().strftime('%Y/%m/%d')]
+    
+    def get_meeting(self, race_date) -> dict:
+        df = self.calendar.query(f'race_date == "{race_date}"')
+        
+        if df.shape[0] == 0:
+            return None
+        
+        return df.iloc[0].to_dict()
+    
+    def update_race_dates(self, race_date) -> None:
+        today = datetime.today().strftime('%Y/%m/%d')
+        
+        # add newly published race dates as pending meetings
+        race_date = [val for val in race_date if val not in self.calendar['race_date'].values]
+        df_merge = pd.DataFrame({
+            'race_date': race_date
+            , 'race_venue': None
+            , 'n_race': 0
+            , 'race_status': 'pending'
+            , 'last_update': today
+        }, columns = self.__columns)
+        
+        self.calendar = pd.concat([self.calendar, df_merge], ignore_index = True)
+        self.calendar['last_update'] = today
+        del df_merge
+        
+        utilities.print_msg(f'{len(race_date)} race date(s) added onto calendar.', 'simple') if len(race_date) else None
+        self.__save_calendar()
+        
+        return None
+    
+    def update_meeting(self, race_date, race_status, race_venue = None, n_race = 0) -> None:
+        # keep the date of last race date refresh
+        meeting = self.get_meeting(race_date)
+        last_update = datetime.today().strftime('%Y/%m/%d') if meeting is None else meeting['last_update']
+        
+        df_merge = pd.DataFrame({
+            'race_date': [race_date]
+            , 'race_venue': [race_venue]
+            , 'n_race': [n_race]
+            , 'race_status': [race_status]
+            , 'last_update': [last_update]
+        })
+        
+        self.calendar = pd.concat([
+            self.calendar.query(f'race_date != "{race_date}"'), df_merge
+        ], ignore_index = True)
+        del df_merge
+        
+        self.__save_calendar()
+        
+        return None
+    
+    def get_probe_url(self, race_date) -> str:
+        # a single load detects status, venue and race card of a pending meeting
+        return f'{self.__url_result}?RaceDate={race_date}'
+    
+    def plan_navigation(self, race_date, race_no = None) -> list:
+        meeting = self.get_meeting(race_date)
+        
+        # skip unknown, pending, overseas and abandoned meetings
+        if (meeting is None) or (meeting['race_status'] != 'local'):
+            return []
+        
+        race_idx = range(1, int(meeting['n_race']) + 1)
+        
+        # allocate target race number if defined
+        if race_no is not None:
+            race_idx = [race_no] if race_no in race_idx else []
+        
+        url = f"{self.__url_result}?RaceDate={race_date}&Racecourse={meeting['race_venue']}"
+        
+        return [(idx, f'{url}&RaceNo={idx}') for idx in race_idx]
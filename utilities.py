@@ -1,17 +1,81 @@
 """
 UTILITIES
-Version 04
+Version 06
     This programme provides functions to avoid reduplicated scripting.
+        A. Status Message
+            1.  Messages are put onto a queue and written to stdout by a background thread.
+            2.  Output is a table (default), one JSON object per line (is_json) or warnings only (is_quiet).
+            3.  A None p_type writes the message as plain text.
 Contribution: Jack Chan
 """
 
 import os
+import sys
+import json
 import time
-import pandas as pd
-from tabulate import tabulate
+import queue
+import atexit
+import logging
+import logging.handlers
+from datetime import datetime
 
-def print_msg(msg, p_type = 'fancy_grid'):
-    print(tabulate([[msg]], tablefmt = p_type))
+logger = logging.getLogger('hkjc')
+listener = None
+
+class TableFormatter(logging.Formatter):
+    def format(self, record) -> str:
+        p_type = getattr(record, 'p_type', 'fancy_grid')
+        
+        # plain message skips tabulate import
+        if p_type is None:
+            return record.getMessage()
+        
+        from tabulate import tabulate
+        
+        return tabulate([[record.getMessage()]], tablefmt = p_type)
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record) -> str:
+        return json.dumps({
+            'time': datetime.fromtimestamp(record.created).strftime('%Y/%m/%d %H:%M:%S')
+            , 'level': record.levelname
+            , 'msg': record.getMessage()
+        })
+
+def init_logger(is_quiet = False, is_json = False):
+    global listener
+    stop_logger()
+    
+    # format and write messages off the scraping thread
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter([TableFormatter(), JsonFormatter()][is_json])
+    
+    msg_queue = queue.SimpleQueue()
+    logger.handlers = [logging.handlers.QueueHandler(msg_queue)]
+    logger.setLevel([logging.INFO, logging.WARNING][is_quiet])
+    logger.propagate = False
+    
+    listener = logging.handlers.QueueListener(msg_queue, handler)
+    listener.start()
+    
+    return None
+
+@atexit.register
+def stop_logger():
+    global listener
+    
+    # flush pending messages
+    if listener is not None:
+        listener.stop()
+        listener = None
+    
+    return None
+
+def print_msg(msg, p_type = 'fancy_grid', level = logging.INFO):
+    if listener is None:
+        init_logger()
+    
+    logger.log(level, msg, extra = {'p_type': p_type})
     
     return None
 
@@ -26,6 +90,8 @@ def elapse_time(function):
     return wrapper
 
 def restore_df(file_name, print_action = False):
+    import pandas as pd
+    
     if os.path.exists(f'./cache/{file_name}.parquet'):
         print_msg(f'Restoring cache file ({file_name})...') if print_action else None
         df = pd.read_parquet(f'./cache/{file_name}.parquet')
@@ -35,9 +101,19 @@ def restore_df(file_name, print_action = False):
     
     return df
 
+def save_df(df, file_name):
+    if not os.path.exists('./cache'):
+        os.makedirs('./cache')
+    
+    df.reset_index(drop = True).to_parquet(f'./cache/{file_name}.parquet')
+    
+    return None
+
 def cache_df(file_name, tab_idx, print_summary = True):
     def inner_decorator(function):
         def wrapper(*args, **args_keys):
+            import pandas as pd
+            
             df_merge = function(*args, **args_keys)
             
             if df_merge is None:
@@ -53,6 +129,11 @@ def cache_df(file_name, tab_idx, print_summary = True):
             
             df = restore_df(file_name)
             
+            # key columns added after the cache file was created
+            for idx in pk:
+                if (df.shape[0] != 0) & (idx not in df.columns):
+                    df[idx] = '---'
+            
             if df.shape[0] == 0:
                 df_merge.to_parquet(f'./cache/{file_name}.parquet')
                 print_msg(f'{df_merge.shape[0]} record(s) cached onto local file.') if print_summary else None